@@ -7,6 +7,13 @@ from tfa_scraper import scrape_tfa_tournament
 
 # ---------- CONFIG ----------
 SHEET_NAME = "TFA_Leaderboard_Data"  # title of your Google Sheet tab
+NEEDED = ["entry", "school", "qualifying_event", "event", "points", "tournament"]
+# pre-aggregated leaderboard tabs, rewritten on append so page loads read
+# a few hundred rows instead of the full raw sheet
+PEOPLE_TAB = "Leaderboard_People"
+SCHOOLS_TAB = "Leaderboard_Schools"
+PEOPLE_HEADER = ["entry", "school", "total_points"]
+SCHOOLS_HEADER = ["school", "total_points"]
 GA_ID = st.secrets.get("GA_ID", "")  # optional, for Google Analytics
 ADMIN_PASSWORD = st.secrets.get("ADMIN_PASSWORD", "")  # set in Streamlit Cloud
 
@@ -31,74 +38,143 @@ st.title("🏆 TFA Points Leaderboard")
 st.caption("Live totals of TFA State Qualification points. Admin can add tournaments below.")
 
 # ---------- Google Sheets client ----------
+@st.cache_resource
 def get_gs_client():
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
     creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
     gc = gspread.authorize(creds)
     return gc
 
-def ensure_sheet(gc):
+def _ensure_tab(sh, title, header):
     try:
-        sh = gc.open(SHEET_NAME)
+        ws = sh.worksheet(title)
+    except gspread.WorksheetNotFound:
+        ws = sh.add_worksheet(title=title, rows=1000, cols=len(header))
+        ws.update([header])
+    return ws
+
+@st.cache_resource
+def ensure_sheet(_gc):
+    # cached so the header check (a full row_values GET) runs once per
+    # process, not on every page load; _gc underscore-prefixed because
+    # gspread clients aren't hashable
+    try:
+        sh = _gc.open(SHEET_NAME)
+        ws = sh.sheet1
+        # ensure header
+        headers = ws.row_values(1)
+        if headers != NEEDED:
+            ws.clear()
+            ws.update([NEEDED])
     except gspread.SpreadsheetNotFound:
-        sh = gc.create(SHEET_NAME)
+        sh = _gc.create(SHEET_NAME)
         # share with yourself if needed (view only): sh.share("youremail@domain.com", perm_type="user", role="reader")
         ws = sh.sheet1
-        ws.update([["entry","school","qualifying_event","event","points","tournament"]])
-        return sh, ws
-    ws = sh.sheet1
-    # ensure header
-    headers = ws.row_values(1)
-    needed = ["entry","school","qualifying_event","event","points","tournament"]
-    if headers != needed:
-        ws.clear()
-        ws.update([needed])
-    return sh, ws
+        ws.update([NEEDED])
+    ws_people = _ensure_tab(sh, PEOPLE_TAB, PEOPLE_HEADER)
+    ws_schools = _ensure_tab(sh, SCHOOLS_TAB, SCHOOLS_HEADER)
+    return sh, ws, ws_people, ws_schools
 
 def load_df(ws):
-    rows = ws.get_all_records()
-    return pd.DataFrame(rows)
+    # one values.get for the whole sheet; skip get_all_records' dict-per-row pass
+    rows = ws.get_all_values()
+    if not rows:
+        return pd.DataFrame(columns=NEEDED)
+    df = pd.DataFrame(rows[1:], columns=rows[0])
+    # one vectorized pass; float32 is exact for point magnitudes and halves
+    # the memory the groupby-sum has to chew through
+    df["points"] = (
+        pd.to_numeric(df["points"].astype(str).str.replace(",", ""), errors="coerce")
+        .fillna(0.0)
+        .astype("float32")
+    )
+    # categoricals: groupby hashes int codes instead of strings
+    df["entry"] = df["entry"].astype("category")
+    df["school"] = df["school"].astype("category")
+    return df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_df(_ws):
+    # leading underscore: gspread worksheets aren't hashable, and we want one
+    # cached frame per process rather than per-worksheet keying anyway
+    return load_df(_ws)
+
+@st.cache_data
+def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(ttl=60)
+def compute_leaderboards(df):
+    # one groupby over the raw rows; school totals then sum the per-entry
+    # result (unique people, not raw rows) instead of regrouping everything
+    per_entry = df.groupby(["entry","school"], observed=True, sort=False)["points"].sum()
+    people = (
+        per_entry.reset_index()
+        .sort_values("points", ascending=False)
+        .rename(columns={"points":"total_points"})
+    )
+    schools = (
+        per_entry.groupby(level="school", observed=True, sort=False)
+        .sum()
+        .reset_index()
+        .sort_values("points", ascending=False)
+        .rename(columns={"points":"total_points"})
+    )
+    return people, schools
+
+def update_leaderboard_sheets(ws_people, ws_schools, df):
+    """Rewrite the pre-aggregated tabs from the full raw frame."""
+    people, schools = compute_leaderboards(df)
+    ws_people.clear()
+    ws_people.update([PEOPLE_HEADER] + people.to_numpy(dtype=object).tolist())
+    ws_schools.clear()
+    ws_schools.update([SCHOOLS_HEADER] + schools.to_numpy(dtype=object).tolist())
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_leaderboards(_ws_people, _ws_schools):
+    """Read the materialized leaderboards; None if they aren't populated yet."""
+    p = _ws_people.get_all_values()
+    s = _ws_schools.get_all_values()
+    if len(p) <= 1 or len(s) <= 1:
+        return None
+    people = pd.DataFrame(p[1:], columns=p[0])
+    people["total_points"] = pd.to_numeric(people["total_points"], errors="coerce").fillna(0.0)
+    schools = pd.DataFrame(s[1:], columns=s[0])
+    schools["total_points"] = pd.to_numeric(schools["total_points"], errors="coerce").fillna(0.0)
+    return people, schools
 
 def append_rows(ws, df_new):
     if df_new.empty:
         return
-    # Order columns
-    cols = ["entry","school","qualifying_event","event","points","tournament"]
-    df_new = df_new[cols]
-    values = [df_new.columns.tolist()] + df_new.values.tolist()
-
-    # skip header because already present
-    values_no_header = values[1:]
-    ws.append_rows(values_no_header, value_input_option="RAW")
+    df_new = df_new[NEEDED].copy()
+    df_new["points"] = df_new["points"].astype(float)
+    payload = df_new.to_numpy(dtype=object).tolist()
+    # table_range="A1" skips gspread's range-discovery GET before the append
+    ws.append_rows(payload, value_input_option="RAW",
+                   insert_data_option="INSERT_ROWS",
+                   table_range="A1")
 
 # ---------- Read current leaderboard ----------
 try:
     gc = get_gs_client()
-    sh, ws = ensure_sheet(gc)
-    data_df = load_df(ws)
+    sh, ws, ws_people, ws_schools = ensure_sheet(gc)
+    data_df = fetch_df(ws)
+    boards = fetch_leaderboards(ws_people, ws_schools)
 except Exception as e:
     st.error(f"Google Sheets connection failed: {e}")
     data_df = pd.DataFrame(columns=["entry","school","qualifying_event","event","points","tournament"])
+    boards = None
 
-# Leaderboard view
-if not data_df.empty:
-    leaderboard_people = (
-        data_df.groupby(["entry","school"])["points"]
-        .sum()
-        .reset_index()
-        .sort_values("points", ascending=False)
-        .rename(columns={"points":"total_points"})
-    )
+# Leaderboard view: prefer the small materialized tabs, fall back to
+# aggregating the raw frame until the tabs are first populated
+if boards is None and not data_df.empty:
+    boards = compute_leaderboards(data_df)
+
+if boards is not None:
+    leaderboard_people, leaderboard_schools = boards
     st.subheader("Leaderboard (Competitors)")
     st.dataframe(leaderboard_people, use_container_width=True)
 
-    leaderboard_schools = (
-        data_df.groupby(["school"])["points"]
-        .sum()
-        .reset_index()
-        .sort_values("points", ascending=False)
-        .rename(columns={"points":"total_points"})
-    )
     st.subheader("Leaderboard (Schools)")
     st.dataframe(leaderboard_schools, use_container_width=True)
 else:
@@ -122,17 +198,42 @@ with st.expander("Open Admin Panel"):
             st.error("Please enter a tournament ID.")
         else:
             with st.spinner("Scraping tournament and updating sheet..."):
-                # scrape
-                scraped = scrape_tfa_tournament(tourn_id.strip())
-                if not scraped:
+                # scrape, with live per-page progress
+                bar = st.progress(0)
+                status = st.empty()
+
+                def _progress(done, total, rid, n_rows):
+                    bar.progress(done / total)
+                    status.write(f"Checked {done}/{total} result pages (result_id={rid}, +{n_rows} rows)")
+
+                scraped = scrape_tfa_tournament(tourn_id.strip(), progress_cb=_progress)
+                bar.empty()
+                status.empty()
+                if scraped.empty:
                     st.warning("No TFA Qualification data found for this tournament.")
                 else:
-                    new_df = pd.DataFrame(scraped)[["entry","school","qualifying_event","event","points","tournament"]]
-                    try:
-                        append_rows(ws, new_df)
-                        st.success(f"Appended {len(new_df)} rows from tournament {tourn_id}.")
-                    except Exception as e:
-                        st.error(f"Failed to append to sheet: {e}")
+                    new_df = scraped[NEEDED]
+                    # anti-join against the sheet so re-scraping the same
+                    # tournament doesn't double its rows
+                    key_cols = ["tournament","entry","event"]
+                    existing = set(map(tuple, data_df[key_cols].astype(str).values.tolist()))
+                    mask = ~new_df[key_cols].astype(str).apply(tuple, axis=1).isin(existing)
+                    new_df = new_df[mask]
+                    if new_df.empty:
+                        st.info("All scraped rows are already on the sheet; nothing to append.")
+                    else:
+                        try:
+                            append_rows(ws, new_df)
+                            update_leaderboard_sheets(
+                                ws_people, ws_schools,
+                                pd.concat([data_df, new_df], ignore_index=True),
+                            )
+                            fetch_df.clear()  # sheet changed; next rerun refetches
+                            fetch_leaderboards.clear()
+                            st.success(f"Appended {len(new_df)} rows from tournament {tourn_id}.")
+                        except Exception as e:
+                            ensure_sheet.clear()  # re-validate headers next run
+                            st.error(f"Failed to append to sheet: {e}")
 
 # ---------- Raw table view + download ----------
 if not data_df.empty:
@@ -140,7 +241,7 @@ if not data_df.empty:
     st.dataframe(data_df, use_container_width=True)
     st.download_button(
         "📥 Download CSV",
-        data=data_df.to_csv(index=False).encode("utf-8"),
+        data=df_to_csv_bytes(data_df),
         file_name="tfa_leaderboard_export.csv",
         mime="text/csv",
     )
@@ -1,30 +1,54 @@
 #!/usr/bin/env python3
-import requests
+import asyncio
+import httpx
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
-import time
+import random
+from io import StringIO
 
 BASE = "https://www.tabroom.com"
 
-SESSION = requests.Session()
-SESSION.headers.update({
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) Python scraper (respectful)"
-})
+_RESULT_ID_RE = re.compile(r"result_id=(\d+)")
 
-def get_soup(url: str) -> BeautifulSoup:
-    r = SESSION.get(url, timeout=30)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "html.parser")
+COLS = ["points", "entry", "school", "qualifying_event", "event", "tournament"]
 
-def extract_result_ids_from_index(tourn_id: str) -> list[int]:
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) Python scraper (respectful)",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+CONCURRENCY = 10      # max in-flight requests to tabroom
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+
+async def get_soup(session: httpx.AsyncClient, url: str) -> BeautifulSoup:
+    last_exc = None
+    for attempt in range(5):
+        try:
+            r = await session.get(url)
+            if r.status_code in (429, 503):
+                await asyncio.sleep(min(2 ** attempt, 8) + random.random())
+                continue
+            r.raise_for_status()
+            # hand lxml raw bytes: skips a decode pass and lets it sniff
+            # the charset itself
+            return BeautifulSoup(r.content, "lxml")
+        except httpx.TransportError as e:
+            # retry only transport failures; HTTPStatusError from
+            # raise_for_status (e.g. a 404 for a bad tournament id)
+            # propagates immediately instead of burning 5 backoffs
+            last_exc = e
+            await asyncio.sleep(min(2 ** attempt, 8) + random.random())
+    raise last_exc if last_exc else httpx.HTTPError(f"giving up on {url}")
+
+async def extract_result_ids_from_index(session: httpx.AsyncClient, tourn_id: str) -> list[int]:
     """Pull all result_ids linked on the tournament results index."""
     url = f"{BASE}/index/tourn/results/index.mhtml?tourn_id={tourn_id}"
-    soup = get_soup(url)
+    soup = await get_soup(session, url)
     ids = set()
     for a in soup.select("a[href*='event_results.mhtml']"):
         href = a.get("href") or ""
-        m = re.search(r"result_id=(\d+)", href)
+        m = _RESULT_ID_RE.search(href)
         if m:
             ids.add(int(m.group(1)))
     ids = sorted(ids)
@@ -33,56 +57,53 @@ def extract_result_ids_from_index(tourn_id: str) -> list[int]:
         print(f"  sample: {ids[:5]} ... {ids[-5:]}")
     return ids
 
+_TFA_TXT_RE = re.compile(r"TFA|Qualification", re.I)
+
+def _has_points_header(tbl) -> bool:
+    first_row = tbl.find("tr")
+    if not first_row:
+        return False
+    header = " ".join(c.get_text(" ", strip=True).lower()
+                      for c in first_row.find_all(["th", "td"]))
+    return "point" in header
+
 def find_tfa_table(soup: BeautifulSoup):
     """Locate the TFA Qualification table."""
-    heading = soup.find(["h3", "h4"], string=lambda x: x and ("TFA" in x or "Qualification" in x))
-    if heading:
-        tbl = heading.find_next("table")
-        if tbl:
-            return tbl
-    # fallback scan
-    for tbl in soup.find_all("table"):
-        header_cells = tbl.find("tr")
-        if not header_cells:
-            continue
-        texts = [c.get_text(" ", strip=True).lower() for c in header_cells.find_all(["th","td"])]
-        header_str = " ".join(texts)
-        if ("point" in header_str) and ("place" in header_str or "placed" in header_str):
-            return tbl
-        if len(texts) >= 3 and ("point" in header_str or "tfa" in header_str):
+    # search text nodes, then walk to the enclosing (or following) table:
+    # O(matching text nodes) instead of materializing every table's cells,
+    # and a fast None on the many pages with no TFA content at all.
+    # "TFA"/"Qualification" also shows up in tournament names, titles and
+    # sidebar links, so only accept a table whose header mentions points
+    for node in soup.find_all(string=_TFA_TXT_RE):
+        tbl = node.find_parent("table")
+        if tbl is None and node.parent is not None:
+            tbl = node.parent.find_next("table")
+        if tbl is not None and _has_points_header(tbl):
             return tbl
     return None
 
-def parse_tfa_rows(table, event_name: str) -> list[dict]:
-    """Parse rows in the TFA table into points, entry, school, qualifying event, event name."""
-    out = []
-    rows = table.find_all("tr")
-    if not rows:
-        return out
-    start_idx = 1 if rows and rows[0].find_all(["th","td"]) else 0
-    for tr in rows[start_idx:]:
-        tds = tr.find_all("td")
-        if len(tds) < 4:
-            continue
-        try:
-            pts_str = tds[0].get_text(" ", strip=True)
-            pts_match = re.search(r"[-+]?\d*\.?\d+", pts_str.replace(",", ""))
-            if not pts_match:
-                continue
-            points = float(pts_match.group(0))
-        except Exception:
-            continue
-        entry = tds[2].get_text(" ", strip=True) if len(tds) >= 3 else ""
-        school = tds[3].get_text(" ", strip=True) if len(tds) >= 4 else ""
-        qualifying_event = tds[4].get_text(" ", strip=True) if len(tds) >= 5 else ""
-        out.append({
-            "points": points,
-            "entry": entry,
-            "school": school,
-            "qualifying_event": qualifying_event,
-            "event": event_name
-        })
-    return out
+_EMPTY = pd.DataFrame(columns=["points", "entry", "school", "qualifying_event", "event"])
+
+def parse_tfa_rows(table, event_name: str) -> pd.DataFrame:
+    """Parse the TFA table into a frame of points, entry, school, qualifying event, event name."""
+    try:
+        raw = pd.read_html(StringIO(str(table)), flavor="lxml", header=0)[0]
+    except ValueError:  # no parseable rows in the table
+        return _EMPTY.copy()
+    if raw.shape[1] < 4:
+        return _EMPTY.copy()
+    # grab positional columns before building the output frame
+    pts = pd.to_numeric(raw.iloc[:, 0].astype(str).str.replace(",", ""), errors="coerce")
+    keep = pts.notna()
+    df = pd.DataFrame({
+        "points": pts[keep],
+        "entry": raw.iloc[:, 2][keep].fillna("").astype(str).str.strip(),
+        "school": raw.iloc[:, 3][keep].fillna("").astype(str).str.strip(),
+        "qualifying_event": (raw.iloc[:, 4][keep].fillna("").astype(str).str.strip()
+                             if raw.shape[1] >= 5 else ""),
+    })
+    df["event"] = event_name
+    return df
 
 def get_event_name(soup: BeautifulSoup) -> str:
     h2 = soup.find("h2")
@@ -94,64 +115,80 @@ def get_event_name(soup: BeautifulSoup) -> str:
         return soup.title.text.split("|")[0].strip()
     return "Unknown Event"
 
-def page_has_tfa_points(tourn_id: str, result_id: int) -> tuple[list[dict], str]:
-    """Fetch a page and return (rows, event_name) if it contains TFA table."""
-    url = f"{BASE}/index/tourn/results/event_results.mhtml?tourn_id={tourn_id}&result_id={result_id}"
+async def _worth_fetching(session: httpx.AsyncClient, url: str) -> bool:
+    """HEAD the page first; skip the GET only for definitive non-200s like 404."""
     try:
-        soup = get_soup(url)
-    except requests.HTTPError:
-        return [], "Unknown Event"
+        h = await session.head(url)
+    except httpx.TransportError:
+        # transient failure: let get_soup's retry/backoff decide
+        return True
+    if h.status_code in (429, 503):
+        # throttled, not missing — get_soup backs off and retries these
+        return True
+    return h.status_code == 200
+
+async def page_has_tfa_points(session: httpx.AsyncClient, sem: asyncio.Semaphore,
+                              tourn_id: str, result_id: int) -> tuple[pd.DataFrame, str]:
+    """Fetch a page and return (frame, event_name) if it contains TFA table."""
+    url = f"{BASE}/index/tourn/results/event_results.mhtml?tourn_id={tourn_id}&result_id={result_id}"
+    async with sem:
+        if not await _worth_fetching(session, url):
+            return _EMPTY.copy(), "Unknown Event"
+        try:
+            soup = await get_soup(session, url)
+        except httpx.HTTPError:
+            return _EMPTY.copy(), "Unknown Event"
     event_name = get_event_name(soup)
     tbl = find_tfa_table(soup)
     if not tbl:
-        return [], event_name
-    rows = parse_tfa_rows(tbl, event_name)
-    return rows, event_name
-
-def find_true_starting_result_id(tourn_id: str, candidates: list[int]) -> int | None:
-    for rid in sorted(candidates):
-        rows, ev = page_has_tfa_points(tourn_id, rid)
-        if rows:
-            print(f"First TFA page found at result_id={rid} ({ev})")
-            return rid
-        time.sleep(0.5)
-    return None
+        return _EMPTY.copy(), event_name
+    return parse_tfa_rows(tbl, event_name), event_name
 
-def scrape_tfa_tournament(tourn_id: str, empty_streak_limit: int = 12) -> list[dict]:
+async def scrape_tfa_tournament_async(tourn_id: str, progress_cb=None) -> pd.DataFrame:
+    """Scrape a tournament; progress_cb(done, total, result_id, n_rows) fires per fetched page."""
     print(f"Starting scrape for tourn_id={tourn_id}")
-    candidates = extract_result_ids_from_index(tourn_id)
-    if not candidates:
-        print("No candidate result_ids found.")
-        return []
-    start_id = find_true_starting_result_id(tourn_id, candidates)
-    if start_id is None:
-        print("No TFA tables found; starting from min candidate.")
-        start_id = min(candidates)
-    all_rows = []
-    rid = start_id
-    empty_streak = 0
-    print(f"Scanning upward from result_id={rid} ...")
-    while empty_streak < empty_streak_limit:
-        rows, ev = page_has_tfa_points(tourn_id, rid)
-        if rows:
-            print(f"→ {len(rows):>3} rows @ result_id={rid} [{ev}]")
-            all_rows.extend(rows)
-            empty_streak = 0
-        else:
-            print(f"   (no points) result_id={rid}")
-            empty_streak += 1
-        rid += 1
-        time.sleep(0.6)
-    print(f"Stopped after {empty_streak_limit} consecutive empties. Last tried result_id={rid-1}.")
-    return all_rows
+    # HTTP/2: all concurrent requests multiplex over one TLS connection
+    # instead of opening a socket (and handshake) apiece
+    async with httpx.AsyncClient(http2=True, timeout=30.0, limits=LIMITS,
+                                 headers=HEADERS, follow_redirects=True) as session:
+        candidates = await extract_result_ids_from_index(session, tourn_id)
+        if not candidates:
+            print("No candidate result_ids found.")
+            return pd.DataFrame(columns=COLS)
+        sem = asyncio.Semaphore(CONCURRENCY)
+        done = 0
+        total = len(candidates)
+
+        async def fetch(rid: int):
+            nonlocal done
+            df, ev = await page_has_tfa_points(session, sem, tourn_id, rid)
+            done += 1
+            if progress_cb:
+                progress_cb(done, total, rid, len(df))
+            return df, ev
+
+        # fetch everything the index links to, concurrently
+        results = await asyncio.gather(*[fetch(rid) for rid in candidates])
+        frames = []
+        for rid, (df, ev) in zip(candidates, results):
+            if not df.empty:
+                print(f"→ {len(df):>3} rows @ result_id={rid} [{ev}]")
+                frames.append(df)
+        print(f"Done. Checked {len(candidates)} result pages.")
+        if not frames:
+            return pd.DataFrame(columns=COLS)
+        return pd.concat(frames, ignore_index=True).assign(tournament=tourn_id)
+
+def scrape_tfa_tournament(tourn_id: str, progress_cb=None) -> pd.DataFrame:
+    """Sync wrapper so Streamlit (and the CLI) can call the async scraper."""
+    return asyncio.run(scrape_tfa_tournament_async(tourn_id, progress_cb=progress_cb))
 
 if __name__ == "__main__":
     tourn_id = input("Enter TFA tournament ID: ").strip()
-    data = scrape_tfa_tournament(tourn_id)
-    if data:
-        df = pd.DataFrame(data)[["points", "entry", "school", "qualifying_event", "event"]]
+    df = scrape_tfa_tournament(tourn_id)
+    if not df.empty:
         out = f"tfa_points_{tourn_id}.csv"
-        df.to_csv(out, index=False)
+        df[COLS].to_csv(out, index=False)
         print(f"\n✅ Saved {len(df)} rows to {out}")
     else:
         print("\n⚠️ No TFA Qualification data found.")